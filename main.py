@@ -7,16 +7,26 @@ Taichung Cafes Crawler (Google Maps Platform)
 - Dedupes by place_id
 - Enriches with Place Details (phone, opening hours, maps url, photos)
 Outputs: CSV with columns:
-  name, address, phone, opening_hours, rating, types, photo_url, maps_url
+  name, address, phone, opening_hours, rating, types, photo_reference, maps_url
+(photo_reference 可用 resolve_photos.py 轉成不含 API Key 的圖片網址)
 """
 
 import os
 import time
 import math
 import csv
+import json
+import queue
+import sqlite3
+import threading
+import numpy as np
+import orjson
 import requests
 import argparse
-from typing import Dict, Any, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple, Set, Tuple
+from urllib3.util.retry import Retry
 
 API_KEY = os.getenv("GOOGLE_API_KEY")
 
@@ -24,10 +34,112 @@ GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 NEARBY_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
 DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
 PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo"
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+# 共用連線：keep-alive 重用 maps.googleapis.com 的 HTTPS 連線
+# 暫時性錯誤（429 / 5xx、連線中斷）以指數退避自動重試，並遵守 Retry-After；
+# 重試用盡後回傳最後的 response，交給 raise_for_status() 處理
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=6,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    ),
+)
+
+# 本地快取（重複執行時略過相同的 Geocoding / Details 請求）
+CACHE_PATH = os.getenv("CRAWLER_CACHE", "cache.db")
+_cache_conn = None
+_cache_lock = threading.Lock()
 
 # ---------- Helpers ----------
 
 
+class RateLimiter:
+    """
+    Thread-safe token bucket: allows up to `rate` calls per second on average,
+    with bursts of at most `burst` calls.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if not rate > 0:
+            raise ValueError(f"rate must be positive: {rate}")
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        if not rate > 0:
+            raise ValueError(f"rate must be positive: {rate}")
+        with self.lock:
+            self.rate = rate
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _cache_db() -> sqlite3.Connection:
+    global _cache_conn
+    if _cache_conn is None:
+        _cache_conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, payload BLOB, ts INTEGER)"
+        )
+    return _cache_conn
+
+
+def cache_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """Stable cache key from endpoint + params (API key excluded)."""
+    p = {k: v for k, v in params.items() if k != "key"}
+    return f"{endpoint}:{json.dumps(p, sort_keys=True, ensure_ascii=False)}"
+
+
+def cache_get(key: str):
+    with _cache_lock:
+        row = (
+            _cache_db()
+            .execute("SELECT payload FROM cache WHERE key=?", (key,))
+            .fetchone()
+        )
+    return json.loads(row[0]) if row else None
+
+
+def cache_put(key: str, data: Dict[str, Any]):
+    with _cache_lock:
+        db = _cache_db()
+        db.execute(
+            "INSERT OR REPLACE INTO cache (key, payload, ts) VALUES (?, ?, ?)",
+            (key, json.dumps(data, ensure_ascii=False), int(time.time())),
+        )
+        db.commit()
+
+
+# 全域 QPS 上限（跨執行緒共用）
+NEARBY_LIMITER = RateLimiter(rate=10)
+DETAILS_LIMITER = RateLimiter(rate=50)
+
+
 def geocode_city_bounds(
     city: str, region: str = "tw", language: str = "zh-TW"
 ) -> Tuple[Tuple[float, float], Tuple[float, float], Tuple[float, float]]:
@@ -38,11 +150,15 @@ def geocode_city_bounds(
         "language": language,
         "region": region,
     }
-    r = requests.get(GEOCODE_URL, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
-    if not data.get("results"):
-        raise RuntimeError(f"Geocoding '{city}' 無結果: {data}")
+    key = cache_key("geocode", params)
+    data = cache_get(key)
+    if data is None:
+        r = SESSION.get(GEOCODE_URL, params=params, timeout=30)
+        r.raise_for_status()
+        data = orjson.loads(r.content)
+        if not data.get("results"):
+            raise RuntimeError(f"Geocoding '{city}' 無結果: {data}")
+        cache_put(key, data)
     res = data["results"][0]
     geometry = res["geometry"]
     viewport = geometry.get("viewport")
@@ -53,6 +169,86 @@ def geocode_city_bounds(
     return ne, sw, center
 
 
+def fetch_city_rings(city: str, language: str = "zh-TW") -> List[np.ndarray]:
+    """
+    Return the city's administrative boundary as a list of (lng, lat) rings via
+    OSM Nominatim. Returns [] when no polygon is available.
+    """
+    params = {
+        "q": city,
+        "format": "json",
+        "polygon_geojson": 1,
+        "polygon_threshold": 0.001,  # 簡化邊界（約 100m），減少頂點數
+        "limit": 1,
+        "accept-language": language,
+    }
+    key = cache_key("nominatim", params)
+    data = cache_get(key)
+    if data is None:
+        r = SESSION.get(
+            NOMINATIM_URL,
+            params=params,
+            headers={"User-Agent": "crawler-taichung-cafes"},
+            timeout=30,
+        )
+        r.raise_for_status()
+        data = {"results": orjson.loads(r.content)}
+        cache_put(key, data)
+    if not data["results"]:
+        return []
+
+    geojson = data["results"][0].get("geojson") or {}
+    if geojson.get("type") == "Polygon":
+        polygons = [geojson["coordinates"]]
+    elif geojson.get("type") == "MultiPolygon":
+        polygons = geojson["coordinates"]
+    else:
+        return []
+    return [np.asarray(ring, dtype=float) for poly in polygons for ring in poly]
+
+
+# grid_mask_near_rings 每次處理的「點 x 邊」元素數上限（每個暫存陣列約 8 MB）
+GRID_MASK_BLOCK_ELEMS = 1 << 20
+
+
+def grid_mask_near_rings(
+    points: np.ndarray, rings: List[np.ndarray], radius_m: int
+) -> np.ndarray:
+    """
+    Boolean mask over (lat, lng) points: True if the point lies inside the rings
+    (even-odd rule, so holes are excluded) or within radius_m of the boundary.
+    Points are processed in blocks so memory stays bounded for dense grids.
+    """
+    inside = np.zeros(len(points), dtype=bool)
+    near = np.zeros(len(points), dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        block = max(1, GRID_MASK_BLOCK_ELEMS // len(ring))
+        for start in range(0, len(points), block):
+            sl = slice(start, start + block)
+            lat = points[sl, :1]
+            lng = points[sl, 1:]
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_cross = (x2 - x1) * (lat - y1) / (y2 - y1) + x1
+            crosses = ((y1 > lat) != (y2 > lat)) & (lng < x_cross)
+            inside[sl] ^= crosses.sum(axis=1) % 2 == 1
+            del x_cross, crosses
+
+            # 點到邊界線段的距離（以點所在緯度做等距投影，單位 km）
+            km_per_deg_lng = 111.320 * np.cos(np.radians(lat))
+            ax, ay = (x1 - lng) * km_per_deg_lng, (y1 - lat) * 110.574
+            dx = (x2 - x1) * km_per_deg_lng
+            dy = (y2 - y1) * 110.574
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = np.clip(-(ax * dx + ay * dy) / (dx * dx + dy * dy), 0, 1)
+            t = np.nan_to_num(t)
+            dist_km = np.hypot(ax + t * dx, ay + t * dy)
+            near[sl] |= dist_km.min(axis=1) <= radius_m / 1000
+    return inside | near
+
+
 def degree_steps_for_radius_m(radius_m: int, at_lat: float) -> Tuple[float, float]:
     """
     Convert a search radius in meters to approx degree steps (lat_step, lng_step).
@@ -76,19 +272,50 @@ def maps_place_url_from_id(place_id: str) -> str:
 
 
 def safe_get(d: Dict, path: List[str], default=None):
+    """Walk nested dicts along path; return default on any missing/non-dict step."""
+    cur = d
     for k in path:
-        d = d.get(k, {})
-    return d or default
+        if not isinstance(cur, dict) or k not in cur:
+            return default
+        cur = cur[k]
+    return cur if cur is not None else default
+
+
+_IGNORE_TYPES = frozenset({"establishment", "point_of_interest", "food"})
 
 
 def clean_types(types: List[str]) -> List[str]:
-    ignore = {"establishment", "point_of_interest", "food"}
-    return [t for t in types or [] if t not in ignore]
+    return [t for t in (types or ()) if t not in _IGNORE_TYPES]
 
 
 # ---------- Places Fetchers ----------
 
 
+class BasicPlace(NamedTuple):
+    """Fallback fields kept from a Nearby Search result (the rest is discarded)."""
+
+    name: str
+    vicinity: str
+    rating: Any
+    types: Tuple[str, ...]
+    photo_reference: str
+
+
+def to_basic_place(r: Dict[str, Any]) -> BasicPlace:
+    photos = r.get("photos") or []
+    return BasicPlace(
+        name=r.get("name") or "",
+        vicinity=r.get("vicinity") or "",
+        rating=r.get("rating", ""),
+        types=tuple(r.get("types") or ()),
+        photo_reference=(photos[0].get("photo_reference") or "") if photos else "",
+    )
+
+
+# Nearby Search 每個點最多 3 頁 x 20 筆
+NEARBY_MAX_RESULTS = 60
+
+
 def nearby_search_all(
     lat: float, lng: float, radius_m: int, language="zh-TW", type_="cafe"
 ) -> List[Dict[str, Any]]:
@@ -106,23 +333,26 @@ def nearby_search_all(
     }
     next_token = None
     page = 0
+    delay = 0.4
+    retries = 0
 
     while True:
         p = dict(params)
         if next_token:
             p["pagetoken"] = next_token
-            # next_page_token 需延遲才能生效
-            time.sleep(2)
 
-        resp = requests.get(NEARBY_URL, params=p, timeout=30)
+        NEARBY_LIMITER.acquire()
+        resp = SESSION.get(NEARBY_URL, params=p, timeout=30)
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
 
         status = data.get("status")
         if status not in ("OK", "ZERO_RESULTS"):
-            # 有時為 INVALID_REQUEST（通常是 pagetoken 還沒就緒），稍等再試
-            if status == "INVALID_REQUEST":
-                time.sleep(2)
+            # INVALID_REQUEST 通常是 pagetoken 還沒就緒：指數退避後重試
+            if status == "INVALID_REQUEST" and next_token and retries < 5:
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+                retries += 1
                 continue
             raise RuntimeError(f"NearbySearch 失敗: {status} {data}")
 
@@ -131,34 +361,31 @@ def nearby_search_all(
 
         next_token = data.get("next_page_token")
         page += 1
-        if not next_token:
-            break
-
-        # 對 API 友善一點，避免 QPS 過高
-        time.sleep(1)
-
         # Nearby Search 最多 3 頁
-        if page >= 3:
+        if not next_token or page >= 3:
             break
 
+        # next_page_token 需短暫延遲才能生效，之後不足的部分交給上面的退避重試
+        time.sleep(0.2)
+        delay = 0.4
+        retries = 0
+
     return all_results
 
 
 def fetch_details(place_id: str, language="zh-TW") -> Dict[str, Any]:
     """
     Fetch detail fields for a place.
+    Only the fields read by build_row are requested (Details is billed per field group).
     """
     fields = [
         "place_id",
         "name",
         "formatted_address",
         "formatted_phone_number",
-        "international_phone_number",
         "opening_hours/weekday_text",
         "rating",
         "types",
-        "url",
-        "website",
         "photos",
     ]
     params = {
@@ -167,34 +394,88 @@ def fetch_details(place_id: str, language="zh-TW") -> Dict[str, Any]:
         "language": language,
         "fields": ",".join(fields),
     }
-    r = requests.get(DETAILS_URL, params=params, timeout=30)
+    key = cache_key("details", params)
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
+    DETAILS_LIMITER.acquire()
+    r = SESSION.get(DETAILS_URL, params=params, timeout=30)
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
     if data.get("status") != "OK":
         # 某些店家可能無法取回 details，回傳空 dict 不中斷
         return {}
+    cache_put(key, data["result"])
     return data["result"]
 
 
+def build_row(pid: str, basic: BasicPlace, d: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge Place Details (d) with the Nearby Search fallback (basic) into a CSV row.
+    """
+    name = d.get("name") or basic.name
+    address = d.get("formatted_address") or basic.vicinity
+    phone = d.get("formatted_phone_number") or ""
+    rating = d.get("rating", basic.rating)
+    types = clean_types(d.get("types") or basic.types)
+    opening_hours = ""
+    oh = safe_get(d, ["opening_hours", "weekday_text"])
+    if isinstance(oh, list):
+        opening_hours = " | ".join(oh)
+
+    # 圖片（取第一張）；只存 reference，避免 API Key 寫進 CSV
+    photos = d.get("photos")
+    photo_reference = basic.photo_reference
+    if photos:
+        photo_reference = photos[0].get("photo_reference") or ""
+
+    maps_url = maps_place_url_from_id(pid)
+
+    return {
+        "name": name or "",
+        "address": address or "",
+        "phone": phone or "",
+        "opening_hours": opening_hours,
+        "rating": rating if rating is not None else "",
+        "types": ", ".join(types),
+        "photo_reference": photo_reference,
+        "maps_url": maps_url,
+    }
+
+
 # ---------- Main Flow ----------
 
 
 def crawl_taichung_cafes(
     city_name: str = "台中市",
-    radius_m: int = 1500,
-    overlap: float = 0.6,
+    radius_m: int = 3000,
+    overlap: float = 0.7,
     language: str = "zh-TW",
-) -> List[Dict[str, Any]]:
+    nearby_workers: int = 20,
+    details_workers: int = 50,
+    clip_to_city: bool = True,
+    min_radius_m: int = 250,
+    nearby_qps: float = 10,
+    details_qps: float = 50,
+) -> Iterator[Dict[str, Any]]:
     """
     - Geocode city bounds
-    - Build grid with given radius & overlap
+    - Build a coarse grid with given radius & overlap
+    - Drop grid points far outside the city boundary (clip_to_city)
     - NearbySearch each grid point (type=cafe) with pagination
+    - Split saturated cells (60 results) into 4 sub-cells, down to min_radius_m
     - Deduplicate by place_id
     - Enrich with Place Details
+    nearby_qps / details_qps cap each endpoint's request rate across all workers.
+    Yields CSV rows as soon as each place is enriched.
     """
     if not API_KEY:
         raise RuntimeError("請先設定環境變數 GOOGLE_API_KEY")
 
+    NEARBY_LIMITER.set_rate(nearby_qps)
+    DETAILS_LIMITER.set_rate(details_qps)
+
     ne, sw, center = geocode_city_bounds(city_name, language=language)
     ne_lat, ne_lng = ne
     sw_lat, sw_lng = sw
@@ -204,93 +485,133 @@ def crawl_taichung_cafes(
     lat_step *= overlap
     lng_step *= overlap
 
-    # 產生網格點
-    lat_points: List[float] = []
-    lng_points: List[float] = []
-
-    lat = sw_lat
-    while lat <= ne_lat:
-        lat_points.append(lat)
-        lat += lat_step
-
-    lng = sw_lng
-    while lng <= ne_lng:
-        lng_points.append(lng)
-        lng += lng_step
+    # 產生網格點（以 index * step 計算，避免浮點累加誤差）
+    # 每個點負責 ±step/2 的方格；點數取到最後一格能蓋過東北邊界，
+    # 否則飽和時切出的子格不會涵蓋邊界附近的狹長區域
+    n_lat = max(int(np.ceil((ne_lat - sw_lat) / lat_step - 0.5)), 0) + 1
+    n_lng = max(int(np.ceil((ne_lng - sw_lng) / lng_step - 0.5)), 0) + 1
+    lat_points = sw_lat + lat_step * np.arange(n_lat)
+    lng_points = sw_lng + lng_step * np.arange(n_lng)
+    grid_lat, grid_lng = np.meshgrid(lat_points, lng_points, indexing="ij")
 
     print(
         f"Geocoded '{city_name}' bounds NE={ne} SW={sw}, grid={len(lat_points)}x{len(lng_points)}"
     )
 
-    # 逐點搜集
-    basic_places: Dict[str, Dict[str, Any]] = {}
-    for i, la in enumerate(lat_points):
-        for j, ln in enumerate(lng_points):
-            results = nearby_search_all(
-                la, ln, radius_m, language=language, type_="cafe"
-            )
+    grid = np.column_stack([grid_lat.ravel(), grid_lng.ravel()])
+    if clip_to_city:
+        # 矩形網格會涵蓋鄰近縣市與山區，只保留行政區內或距邊界一個半徑內的點
+        try:
+            rings = fetch_city_rings(city_name, language=language)
+        except requests.RequestException as e:
+            print(f"City boundary lookup failed, using full grid: {e}")
+            rings = []
+        if rings:
+            total = len(grid)
+            grid = grid[grid_mask_near_rings(grid, rings, radius_m)]
+            print(f"Grid points within city boundary: {len(grid)}/{total}")
+
+    # 逐點搜集與補齊 Details 以 pipeline 重疊執行：
+    # 每個網格點搜尋完成後，新的 place_id 立即送進 Details worker pool，
+    # 完成的 future 都透過 done_q 回到這裡（唯一操作 basic_places 的執行緒）。
+    # 每個 cell 為 (lat, lng, radius_m, lat_step, lng_step)
+    cells = [(la, ln, radius_m, lat_step, lng_step) for la, ln in grid.tolist()]
+    basic_places: Dict[str, BasicPlace] = {}
+    seen_ids: Set[str] = set()
+    seen_lock = threading.Lock()
+
+    def search_cell(
+        cell: Tuple[float, float, int, float, float],
+    ) -> Tuple[
+        List[Tuple[str, BasicPlace]], List[Tuple[float, float, int, float, float]], bool
+    ]:
+        """
+        Nearby Search one grid cell, keeping only place_ids not seen before.
+        Returns (new places, sub-cells to search if the cell was saturated,
+        whether the cell is saturated but already at min_radius_m).
+        """
+        la, ln, r_m, la_step, ln_step = cell
+        results = nearby_search_all(la, ln, r_m, language=language, type_="cafe")
+
+        # 回傳已達 60 筆上限 → 此格可能還有漏掉的店家，切成四個半徑減半的子格
+        sub_cells = []
+        saturated = len(results) >= NEARBY_MAX_RESULTS
+        truncated = saturated and r_m // 2 < min_radius_m
+        if saturated and not truncated:
+            for dla in (-la_step / 4, la_step / 4):
+                for dln in (-ln_step / 4, ln_step / 4):
+                    sub_cells.append(
+                        (la + dla, ln + dln, r_m // 2, la_step / 2, ln_step / 2)
+                    )
+
+        new_results = []
+        with seen_lock:
             for r in results:
                 pid = r.get("place_id")
-                if not pid:
-                    continue
                 # 僅保留最早抓到的（附近點資料相同）
-                if pid not in basic_places:
-                    basic_places[pid] = r
-            # 控制頻率，避免過快
-            time.sleep(0.5)
-
-    print(f"Found unique places: {len(basic_places)}")
-
-    # 補齊 Details
-    output_rows: List[Dict[str, Any]] = []
-    for idx, pid in enumerate(basic_places.keys(), 1):
-        d = fetch_details(pid, language=language) or {}
-        name = d.get("name") or basic_places[pid].get("name")
-        address = d.get("formatted_address") or basic_places[pid].get("vicinity")
-        phone = (
-            d.get("formatted_phone_number") or d.get("international_phone_number") or ""
-        )
-        rating = d.get("rating", basic_places[pid].get("rating", ""))
-        types = clean_types(d.get("types") or basic_places[pid].get("types") or [])
-        opening_hours = ""
-        oh = safe_get(d, ["opening_hours", "weekday_text"])
-        if isinstance(oh, list):
-            opening_hours = " | ".join(oh)
-
-        # 圖片（取第一張）
-        photos = d.get("photos") or basic_places[pid].get("photos") or []
-        photo_url = ""
-        if photos:
-            ref = photos[0].get("photo_reference")
-            if ref:
-                photo_url = build_photo_url(ref, maxwidth=800)
-
-        maps_url = d.get("url") or maps_place_url_from_id(pid)
-
-        row = {
-            "name": name or "",
-            "address": address or "",
-            "phone": phone or "",
-            "opening_hours": opening_hours,
-            "rating": rating if rating is not None else "",
-            "types": ", ".join(types),
-            "photo_url": photo_url,
-            "maps_url": maps_url,
-        }
-        output_rows.append(row)
-
-        # 對 API 友善一點
-        time.sleep(0.25)
-        if idx % 50 == 0:
-            print(f"Enriched {idx}/{len(basic_places)}")
-
-    return output_rows
-
-
-def save_csv(rows: List[Dict[str, Any]], out_path: str):
-    if not rows:
-        print("No data to save.")
-        return
+                if pid and pid not in seen_ids:
+                    seen_ids.add(pid)
+                    new_results.append((pid, to_basic_place(r)))
+        return new_results, sub_cells, truncated
+
+    done_q: "queue.Queue[Future]" = queue.Queue()
+    details_futures: Dict[Future, str] = {}
+
+    nearby_ex = ThreadPoolExecutor(max_workers=nearby_workers)
+    details_ex = ThreadPoolExecutor(max_workers=details_workers)
+    try:
+        def submit_cell(cell):
+            nearby_ex.submit(search_cell, cell).add_done_callback(done_q.put)
+
+        for cell in cells:
+            submit_cell(cell)
+
+        searches_left = len(cells)
+        searched = 0
+        truncated_cells = 0
+        enriched = 0
+        while searches_left or details_futures:
+            fut = done_q.get()
+            pid = details_futures.pop(fut, None)
+            if pid is not None:
+                enriched += 1
+                yield build_row(pid, basic_places[pid], fut.result() or {})
+                if enriched % 50 == 0:
+                    print(f"Enriched {enriched}/{len(basic_places)}")
+                continue
+
+            searches_left -= 1
+            searched += 1
+            new_places, sub_cells, truncated = fut.result()
+            truncated_cells += truncated
+            for cell in sub_cells:
+                submit_cell(cell)
+            searches_left += len(sub_cells)
+            for pid, basic in new_places:
+                basic_places[pid] = basic
+                dfut = details_ex.submit(fetch_details, pid, language=language)
+                details_futures[dfut] = pid
+                dfut.add_done_callback(done_q.put)
+            if not searches_left:
+                print(
+                    f"Found unique places: {len(basic_places)} ({searched} cells searched)"
+                )
+                if truncated_cells:
+                    print(
+                        f"Warning: {truncated_cells} cells returned "
+                        f"{NEARBY_MAX_RESULTS} results but could not be split below "
+                        f"--min-radius {min_radius_m} m; some places may be missing."
+                    )
+    finally:
+        nearby_ex.shutdown(wait=False, cancel_futures=True)
+        details_ex.shutdown(wait=False, cancel_futures=True)
+
+
+def save_csv(rows: Iterable[Dict[str, Any]], out_path: str):
+    """
+    Write rows to CSV as they arrive, so partial results survive a crash.
+    The file is only created once the first row is available.
+    """
     cols = [
         "name",
         "address",
@@ -298,14 +619,34 @@ def save_csv(rows: List[Dict[str, Any]], out_path: str):
         "opening_hours",
         "rating",
         "types",
-        "photo_url",
+        "photo_reference",
         "maps_url",
     ]
-    with open(out_path, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=cols)
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"Saved: {out_path} ({len(rows)} rows)")
+    f = None
+    count = 0
+    try:
+        for row in rows:
+            if f is None:
+                f = open(out_path, "w", newline="", encoding="utf-8-sig")
+                writer = csv.DictWriter(f, fieldnames=cols)
+                writer.writeheader()
+            writer.writerow(row)
+            f.flush()
+            count += 1
+    finally:
+        if f is not None:
+            f.close()
+    if not count:
+        print("No data to save.")
+        return
+    print(f"Saved: {out_path} ({count} rows)")
+
+
+def positive_float(value: str) -> float:
+    f = float(value)
+    if not f > 0:
+        raise argparse.ArgumentTypeError(f"must be > 0: {value}")
+    return f
 
 
 def parse_args():
@@ -318,18 +659,53 @@ def parse_args():
     ap.add_argument(
         "--radius",
         type=int,
-        default=1500,
-        help="Nearby Search radius in meters (default: 1500)",
+        default=3000,
+        help="Initial Nearby Search radius in meters (default: 3000)",
     )
     ap.add_argument(
         "--overlap",
         type=float,
-        default=0.6,
-        help="Grid overlap factor <1 (default: 0.6)",
+        default=0.7,
+        help="Grid overlap factor <1 (default: 0.7)",
+    )
+    ap.add_argument(
+        "--min-radius",
+        type=int,
+        default=250,
+        help="Smallest radius when splitting saturated cells (default: 250)",
     )
     ap.add_argument(
         "--lang", default="zh-TW", help="Language for API responses (default: zh-TW)"
     )
+    ap.add_argument(
+        "--nearby-workers",
+        type=int,
+        default=20,
+        help="Concurrent Nearby Search workers (default: 20)",
+    )
+    ap.add_argument(
+        "--details-workers",
+        type=int,
+        default=50,
+        help="Concurrent Place Details workers (default: 50)",
+    )
+    ap.add_argument(
+        "--nearby-qps",
+        type=positive_float,
+        default=10,
+        help="Nearby Search requests per second across all workers (default: 10)",
+    )
+    ap.add_argument(
+        "--details-qps",
+        type=positive_float,
+        default=50,
+        help="Place Details requests per second across all workers (default: 50)",
+    )
+    ap.add_argument(
+        "--no-clip",
+        action="store_true",
+        help="Search the whole bounding-box grid instead of clipping it to the city boundary",
+    )
     ap.add_argument(
         "--out",
         default="taichung_cafes.csv",
@@ -345,5 +721,11 @@ if __name__ == "__main__":
         radius_m=args.radius,
         overlap=args.overlap,
         language=args.lang,
+        nearby_workers=args.nearby_workers,
+        details_workers=args.details_workers,
+        clip_to_city=not args.no_clip,
+        min_radius_m=args.min_radius,
+        nearby_qps=args.nearby_qps,
+        details_qps=args.details_qps,
     )
     save_csv(rows, args.out)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Resolve photo_reference -> photo_url for a CSV produced by main.py
+- Calls the Place Photo endpoint concurrently (without following the redirect)
+- Stores the redirect target (googleusercontent URL), which carries no API key
+Outputs: the input columns plus photo_url
+"""
+
+import csv
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from main import API_KEY, SESSION, RateLimiter, build_photo_url
+
+PHOTO_LIMITER = RateLimiter(rate=50)
+
+
+def resolve_photo(photo_reference: str, maxwidth: int = 800) -> str:
+    """Return the final image URL for a photo_reference ('' if unavailable)."""
+    if not photo_reference:
+        return ""
+    PHOTO_LIMITER.acquire()
+    r = SESSION.get(
+        build_photo_url(photo_reference, maxwidth=maxwidth),
+        allow_redirects=False,
+        timeout=30,
+    )
+    if r.is_redirect:
+        return r.headers.get("Location", "")
+    # 照片不存在或 reference 過期時，不中斷整批；其他錯誤（金鑰無效、配額等）直接中止
+    if r.status_code in (400, 404):
+        return ""
+    r.raise_for_status()
+    return ""
+
+
+def resolve_csv(in_path: str, out_path: str, maxwidth: int = 800, workers: int = 20):
+    with open(in_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        cols = list(reader.fieldnames or [])
+        rows = list(reader)
+    if "photo_url" not in cols:
+        cols.append("photo_url")
+
+    refs = [row.get("photo_reference", "") for row in rows]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        urls = ex.map(lambda ref: resolve_photo(ref, maxwidth=maxwidth), refs)
+        with open(out_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=cols)
+            writer.writeheader()
+            missing = 0
+            for idx, (row, url) in enumerate(zip(rows, urls), 1):
+                row["photo_url"] = url
+                if row.get("photo_reference") and not url:
+                    missing += 1
+                writer.writerow(row)
+                if idx % 50 == 0:
+                    print(f"Resolved {idx}/{len(rows)}")
+    if missing:
+        print(f"Photos not found: {missing}")
+    print(f"Saved: {out_path} ({len(rows)} rows)")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(
+        description="Resolve photo_reference columns into image URLs"
+    )
+    ap.add_argument(
+        "--in",
+        dest="in_path",
+        default="taichung_cafes.csv",
+        help="Input CSV from main.py (default: taichung_cafes.csv)",
+    )
+    ap.add_argument(
+        "--out",
+        default="taichung_cafes_photos.csv",
+        help="Output CSV path (default: taichung_cafes_photos.csv)",
+    )
+    ap.add_argument(
+        "--maxwidth",
+        type=int,
+        default=800,
+        help="Photo max width in pixels (default: 800)",
+    )
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=20,
+        help="Concurrent photo requests (default: 20)",
+    )
+    return ap.parse_args()
+
+
+if __name__ == "__main__":
+    if not API_KEY:
+        raise RuntimeError("請先設定環境變數 GOOGLE_API_KEY")
+    args = parse_args()
+    resolve_csv(args.in_path, args.out, maxwidth=args.maxwidth, workers=args.workers)
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import main
+
+SW = (24.1, 120.6)
+NE = (24.2, 120.7)
+
+
+def fake_places(n: int, seed: int = 0) -> np.ndarray:
+    """n cafés spread evenly over the SW/NE bounding box, as (lat, lng)."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack(
+        [rng.uniform(SW[0], NE[0], n), rng.uniform(SW[1], NE[1], n)]
+    )
+
+
+def fake_nearby(places: np.ndarray):
+    """Nearby Search stand-in: places within radius, capped at 60 in arbitrary order."""
+    order = np.random.default_rng(1).permutation(len(places))
+
+    def nearby_search_all(lat, lng, radius_m, language="zh-TW", type_="cafe"):
+        dy = (places[:, 0] - lat) * 110.574
+        dx = (places[:, 1] - lng) * 111.320 * np.cos(np.radians(lat))
+        hit = np.hypot(dx, dy) <= radius_m / 1000
+        ids = order[hit[order]][: main.NEARBY_MAX_RESULTS]
+        return [{"place_id": f"p{i}", "name": f"cafe {i}"} for i in ids]
+
+    return nearby_search_all
+
+
+class CrawlCoverageTest(unittest.TestCase):
+    def crawl(self, places, **kwargs):
+        center = ((SW[0] + NE[0]) / 2, (SW[1] + NE[1]) / 2)
+        out = io.StringIO()
+        with mock.patch.object(main, "API_KEY", "test"), mock.patch.object(
+            main, "geocode_city_bounds", return_value=(NE, SW, center)
+        ), mock.patch.object(
+            main, "nearby_search_all", fake_nearby(places)
+        ), mock.patch.object(
+            main, "fetch_details", return_value={}
+        ), contextlib.redirect_stdout(out):
+            rows = list(main.crawl_taichung_cafes(clip_to_city=False, **kwargs))
+        return rows, out.getvalue()
+
+    def test_quadtree_finds_every_place(self):
+        places = fake_places(3000)
+        for radius, overlap in ((3000, 0.7), (1500, 0.6)):
+            with self.subTest(radius=radius, overlap=overlap):
+                rows, log = self.crawl(places, radius_m=radius, overlap=overlap)
+                self.assertEqual(len(rows), len(places))
+                self.assertNotIn("Warning", log)
+
+    def test_warns_when_saturated_at_min_radius(self):
+        places = fake_places(3000)
+        rows, log = self.crawl(places, radius_m=3000, overlap=0.7, min_radius_m=3000)
+        self.assertLess(len(rows), len(places))
+        self.assertIn("could not be split below --min-radius 3000 m", log)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import tracemalloc
+import unittest
+
+import numpy as np
+
+import main
+
+
+def ellipse_ring(n: int) -> np.ndarray:
+    """Synthetic (lng, lat) boundary roughly covering Taichung's bbox."""
+    theta = np.linspace(0, 2 * np.pi, n)
+    return np.column_stack(
+        [120.95 + 0.45 * np.cos(theta), 24.22 + 0.2 * np.sin(theta)]
+    )
+
+
+class GridMaskNearRingsTest(unittest.TestCase):
+    def test_inside_hole_and_near_boundary(self):
+        square = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]], dtype=float)
+        hole = np.array(
+            [[0.4, 0.4], [0.6, 0.4], [0.6, 0.6], [0.4, 0.6], [0.4, 0.4]], dtype=float
+        )
+        points = np.array(
+            [
+                [0.5, 0.2],  # inside
+                [0.5, 0.5],  # in the hole, far from its edge
+                [0.5, 1.005],  # outside, ~0.6 km from the edge
+                [1.02, 0.5],  # outside, ~2.2 km from the edge
+            ]
+        )
+        mask = main.grid_mask_near_rings(points, [square, hole], 1500)
+        self.assertEqual(mask.tolist(), [True, False, True, False])
+
+    def test_blocked_result_matches_single_block(self):
+        ring = ellipse_ring(200)
+        la, ln = np.meshgrid(
+            np.linspace(23.95, 24.5, 40), np.linspace(120.4, 121.5, 50), indexing="ij"
+        )
+        points = np.column_stack([la.ravel(), ln.ravel()])
+        expected = main.grid_mask_near_rings(points, [ring], 1000)
+
+        old = main.GRID_MASK_BLOCK_ELEMS
+        main.GRID_MASK_BLOCK_ELEMS = 1000
+        try:
+            blocked = main.grid_mask_near_rings(points, [ring], 1000)
+        finally:
+            main.GRID_MASK_BLOCK_ELEMS = old
+        np.testing.assert_array_equal(blocked, expected)
+
+    def test_peak_memory_bounded_for_small_radius(self):
+        # radius 500 m / overlap 0.6 over Taichung's bbox: ~60k points x 2000 edges
+        ring = ellipse_ring(2000)
+        lat_step, lng_step = main.degree_steps_for_radius_m(500, 24.2)
+        la, ln = np.meshgrid(
+            np.arange(23.99, 24.45, lat_step * 0.6),
+            np.arange(120.46, 121.45, lng_step * 0.6),
+            indexing="ij",
+        )
+        points = np.column_stack([la.ravel(), ln.ravel()])
+
+        tracemalloc.start()
+        try:
+            main.grid_mask_near_rings(points, [ring], 500)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 200 * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()